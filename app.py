@@ -2,19 +2,22 @@ import os
 import re
 import json
 import uuid
+import threading
+from typing import Any, Optional, Union
+import msgspec
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from io import BytesIO
-import matplotlib.pyplot as plt
 import streamlit as st
-from pptx import Presentation
-from pptx.util import Inches, Pt
-from pptx.dml.color import RGBColor
-import PyPDF2  # For PDF parsing
+import pypdfium2 as pdfium  # For PDF parsing
 from bs4 import BeautifulSoup  # For HTML parsing
 
 # Additional imports for Google Slides API
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
+from google_auth_httplib2 import AuthorizedHttp
+import httplib2
 
 # --- Configuration ---
 # Cohere configuration for text generation
@@ -25,60 +28,94 @@ COHERE_TEXT_ENDPOINT = st.secrets["COHERE_TEXT_EP"]  # e.g. "https://api.cohere.
 GEMINI_API_KEY = st.secrets["API-KEY"]
 GEMINI_IMAGE_ENDPOINT = st.secrets["EP"]  # This endpoint should return image data
 
+# Upper bound on requested completion length; decoding time and server-side
+# allocation grow with max_tokens, so callers cannot ask for more than this.
+MAX_GENERATION_TOKENS = 4096
+
 # Google service account credentials are stored under st.secrets["google_service_account"]
+SLIDES_SCOPES = ["https://www.googleapis.com/auth/presentations"]
+
+# --- HTTP Sessions ---
+# One pooled session per API so TCP/TLS connections are kept alive and reused
+# instead of re-handshaking on every request. Auth headers are set once on the
+# session rather than rebuilt for each call. Sessions are held in
+# st.cache_resource because Streamlit re-executes this module on every rerun;
+# module-level sessions would be rebuilt (and their pools discarded) each time.
+@st.cache_resource
+def get_api_session(api_key):
+    session = requests.Session()
+    session.headers.update({
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    })
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=10,
+            pool_maxsize=10,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset({"POST"}),
+                raise_on_status=False,
+            ),
+        ),
+    )
+    return session
 
 # --- Helper: Robust JSON Extraction ---
 def extract_json(text):
     """
-    Attempt to extract a valid JSON substring from a text response.
-    Tries both object ({...}) and array ([...]) patterns.
+    Attempt to extract a valid JSON value embedded in a text response.
+    Decoding starts at the first '{' or '[' (whichever comes first, then the
+    other) and stops at the end of that value, so surrounding prose is ignored
+    and each attempt is a single linear scan.
     """
-    obj_match = re.search(r'({.*})', text, re.DOTALL)
-    if obj_match:
-        try:
-            return json.loads(obj_match.group(1))
-        except Exception:
-            pass
-    arr_match = re.search(r'(\[.*\])', text, re.DOTALL)
-    if arr_match:
+    decoder = json.JSONDecoder()
+    starts = sorted(i for i in (text.find("{"), text.find("[")) if i >= 0)
+    for start in starts:
         try:
-            return json.loads(arr_match.group(1))
-        except Exception:
+            return decoder.raw_decode(text, start)[0]
+        except ValueError:
             pass
     raise ValueError("No valid JSON could be extracted.")
 
 # --- Cohere Text Generation Function ---
+# Responses are cached in memory keyed on the call arguments, so repeated
+# prompts (reruns, regenerating the same deck) skip the network. Generation is
+# sampled, so entries expire after an hour rather than persisting on disk.
+@st.cache_data(ttl=3600, show_spinner=False)
 def cohere_text_generate(prompt, max_tokens=150, temperature=0.6):
-    headers = {
-        "Authorization": f"Bearer {COHERE_API_KEY}",
-        "Content-Type": "application/json"
-    }
     payload = {
         "model": "command-xlarge-nightly",  # Adjust model as needed
         "prompt": prompt,
-        "max_tokens": max_tokens,
+        "max_tokens": min(max_tokens, MAX_GENERATION_TOKENS),
         "temperature": temperature
     }
     try:
-        response = requests.post(COHERE_TEXT_ENDPOINT, headers=headers, json=payload)
+        response = get_api_session(COHERE_API_KEY).post(COHERE_TEXT_ENDPOINT, json=payload)
         response.raise_for_status()
     except Exception as e:
         st.error("Request to Cohere API failed.")
         st.error(str(e))
         raise
 
-    raw_text = response.text.strip()
-    if not raw_text:
+    # Work on the raw bytes: the JSON path (the common case) never needs the
+    # body decoded to str, which is only done for the text/HTML fallbacks.
+    raw_data = response.content
+    if not raw_data or raw_data.isspace():
         st.error("API Problem: Cohere API returned an empty response.")
         raise ValueError("Cohere API returned an empty response.")
 
+    encoding = response.encoding or "utf-8"
     content_type = response.headers.get("Content-Type", "").lower()
     if "application/json" in content_type:
         try:
-            data = response.json()
-        except json.JSONDecodeError as e:
+            data = msgspec.json.decode(raw_data)
+        except msgspec.DecodeError as e:
             st.error("Failed to parse JSON from Cohere API. Raw response:")
-            st.text(raw_text)
+            st.text(raw_data.decode(encoding, errors="replace"))
             raise e
         try:
             generated_text = data["generations"][0]["text"].strip()
@@ -86,8 +123,10 @@ def cohere_text_generate(prompt, max_tokens=150, temperature=0.6):
             st.error("Cohere API did not return any generated text.")
             raise ValueError("Cohere API did not return any generated text.") from e
         return generated_text
-    elif "text/html" in content_type or raw_text.lower().startswith("<!doctype html"):
-        soup = BeautifulSoup(raw_text, "html.parser")
+
+    raw_text = raw_data.decode(encoding, errors="replace").strip()
+    if "text/html" in content_type or raw_text[:14].lower() == "<!doctype html":
+        soup = BeautifulSoup(raw_text, "lxml")
         parsed_text = soup.get_text(separator="\n", strip=True)
         if not parsed_text:
             st.error("Parsed HTML is empty.")
@@ -97,208 +136,338 @@ def cohere_text_generate(prompt, max_tokens=150, temperature=0.6):
         return raw_text
 
 # --- Gemini Image Generation Function ---
+# Compiled once per script run, not per call: an HTML error page is recognised
+# by its doctype and reported by its <title>, without lowercasing or copying
+# the body.
+_HTML_DOCTYPE_RE = re.compile(rb"\s*<!doctype html>", re.IGNORECASE)
+_HTML_TITLE_RE = re.compile(rb"<title>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+
+@st.cache_data(ttl=3600, show_spinner=False)
 def gemini_image_generate(prompt, width=512, height=512):
-    headers = {
-        "Authorization": f"Bearer {GEMINI_API_KEY}",
-        "Content-Type": "application/json"
-    }
     payload = {
         "prompt": prompt,
         "width": width,
         "height": height
     }
+    response = None
     try:
-        response = requests.post(GEMINI_IMAGE_ENDPOINT, headers=headers, json=payload)
+        response = get_api_session(GEMINI_API_KEY).post(GEMINI_IMAGE_ENDPOINT, json=payload, stream=True)
         response.raise_for_status()
     except Exception as e:
+        if response is not None:
+            response.close()
         st.error("Request to Gemini Image API failed.")
         st.error(str(e))
         raise
 
-    raw_data = response.content
-    if raw_data.strip().lower().startswith(b"<!doctype html>"):
-        html_text = BeautifulSoup(raw_data, "html.parser").get_text(separator="\n", strip=True)
-        st.error("Expected image data but received HTML. Parsed HTML content:")
-        st.text(html_text)
-        raise ValueError("Non-image response received from Gemini Image API.")
+    # Stream the body so an HTML error page is recognised from its first chunk
+    # and abandoned, rather than downloaded in full before being rejected.
+    with response:
+        chunks = response.iter_content(chunk_size=8192)
+        first_chunk = next(chunks, b"")
+        if _HTML_DOCTYPE_RE.match(first_chunk):
+            # An HTML body here is an error page; its <title> is enough to report
+            # it, so skip building a full parse tree.
+            title_match = _HTML_TITLE_RE.search(first_chunk)
+            st.error("Expected image data but received HTML. Page title:")
+            st.text(title_match.group(1).decode(errors="ignore").strip() if title_match else "(no title)")
+            raise ValueError("Non-image response received from Gemini Image API.")
+        raw_data = first_chunk + b"".join(chunks)
     return raw_data
 
 # --- Chart Generation ---
-def generate_chart(chart_info):
-    """
-    Generates a chart using matplotlib based on chart_info.
-    Expected format:
-      {
-        "type": "bar",  # or "line"
-        "title": "Chart Title",
-        "labels": ["Label1", "Label2", ...],
-        "values": [val1, val2, ...]
-      }
-    """
-    chart_type = chart_info.get("type", "bar")
-    title = chart_info.get("title", "")
-    labels = chart_info.get("labels", [])
-    values = chart_info.get("values", [])
-    
-    plt.style.use('dark_background')
-    plt.figure(figsize=(4, 3))
-    
-    if chart_type == "bar":
-        plt.bar(labels, values, color='#4B0082')
-    elif chart_type == "line":
-        plt.plot(labels, values, marker='o', linestyle='-', color='#4B0082')
-    
-    plt.title(title, color='white')
-    plt.tight_layout()
-    
+# A single figure is reused for every chart; building a new Figure per call
+# dominated chart time. matplotlib is not thread-safe and Streamlit serves
+# each session from its own thread, so access is serialized with a lock.
+# matplotlib itself is only imported when the first chart is drawn, so app
+# start-up does not pay for it. The lock is cached together with the figure:
+# Streamlit re-executes this module on every rerun, so a module-level lock
+# would not be shared between sessions.
+
+# Outlines come from a model; anything beyond this many points is treated as
+# malformed rather than spending seconds rendering it.
+MAX_CHART_POINTS = 200
+
+@st.cache_resource
+def get_chart_canvas():
+    """Return the shared (figure, axes, lock) triple. Draw on the figure only with the lock held."""
+    import matplotlib
+    matplotlib.use("Agg")  # Headless server; skip GUI backend probing
+    import matplotlib.style
+    from matplotlib.figure import Figure
+    # Applied once here rather than per chart; ax.clear() re-reads these rcParams.
+    matplotlib.style.use('dark_background')
+    fig = Figure(figsize=(4, 3))
+    ax = fig.subplots()
+    fig.patch.set_facecolor('black')
+    return fig, ax, threading.Lock()
+
+@st.cache_data(show_spinner=False, persist="disk")
+def render_chart(chart_type, title, labels, values):
+    """Render a bar or line chart to PNG. Arguments are plain values so the cache key never pickles outline structs."""
     img_stream = BytesIO()
-    plt.savefig(img_stream, format='PNG', facecolor='black')
-    plt.close()
+    fig, ax, lock = get_chart_canvas()
+    with lock:
+        ax.clear()
+        
+        if chart_type == "bar":
+            ax.bar(labels, values, color='#4B0082')
+        elif chart_type == "line":
+            ax.plot(labels, values, marker='o', linestyle='-', color='#4B0082')
+        
+        ax.set_title(title, color='white')
+        fig.tight_layout()
+        fig.savefig(img_stream, format='png', facecolor='black', dpi=72,
+                    pil_kwargs={"compress_level": 1})
     img_stream.seek(0)
     return img_stream
 
+def generate_chart(chart):
+    """
+    Generates a chart using matplotlib from an outline Chart (see parse_chart)
+    (type "bar" or "line", title, labels, values). A missing type draws a bar chart.
+    Returns None, without touching matplotlib, when labels/values are empty,
+    differ in length, exceed MAX_CHART_POINTS, or a value is not numeric;
+    callers should skip the chart.
+    """
+    labels = chart.labels
+    if not labels or len(labels) != len(chart.values) or len(labels) > MAX_CHART_POINTS:
+        return None
+    try:
+        values = tuple(float(v) for v in chart.values)
+    except (TypeError, ValueError):
+        return None
+    return render_chart(chart.type or "bar", chart.title, tuple(map(str, labels)), values)
+
 # --- Deep Research Generation ---
 def generate_deep_research_content(slide_title, slide_content):
     prompt = (
         "You are a consultant at a top consulting firm. Provide a deep research summary for a client presentation slide with the title "
-        f"'{slide_title}' and content: '{slide_content}'. Include key insights, critical analysis, and relevant references as bullet points. "
+        f"{json.dumps(slide_title, ensure_ascii=False)} and content: {json.dumps(slide_content, ensure_ascii=False)}. Include key insights, critical analysis, and relevant references as bullet points. "
         "Output only the bullet points."
     )
     research_text = cohere_text_generate(prompt, max_tokens=150, temperature=0.5)
     return research_text
 
+# --- Outline Schema ---
+# The outline JSON is decoded straight into these structs; defaults mirror the
+# fallbacks the rest of the app used to apply with dict.get().
+class Chart(msgspec.Struct):
+    type: str = ""
+    title: str = ""
+    # Models freely emit years as numbers and values like "12%" or null, so
+    # these accept what the outline may contain; generate_chart decides what
+    # can actually be plotted.
+    labels: list[Union[str, int, float]] = []
+    values: list[Union[float, str, None]] = []
+
+class Slide(msgspec.Struct):
+    title: str = "Untitled Slide"
+    content: str = ""
+    image_prompt: Optional[str] = None
+    # Kept as the decoded JSON value and validated by parse_chart() where it is
+    # used, so a malformed chart drops only the chart, never the slides.
+    chart: Any = None
+
+def parse_chart(value):
+    """Return a slide's chart as a Chart, or None if it is missing or malformed."""
+    if value is None:
+        return None
+    try:
+        return msgspec.convert(value, type=Chart, strict=False)
+    except msgspec.ValidationError:
+        return None
+
 # --- Outline Generation ---
+_OUTLINE_PROMPT_PREFIX = (
+    "You are a consultant at a top consulting firm. Based on the following analysis, design a complete slide deck outline "
+    "with natural flow. For each slide, provide a 'title' and 'content'. "
+    "If an image would enhance the slide, include an 'image_prompt' key with a brief description. "
+    "If a chart is needed, include a 'chart' key with an object specifying 'type' (bar or line), 'title', 'labels', and 'values'. "
+    "Output a valid JSON array with no extra commentary.\n\n"
+    "Analysis:\n"
+)
+_OUTLINE_PROMPT_SUFFIX = "\n\nOutput the JSON array only."
+
+# Not cached itself: the model call underneath is, and decoding here keeps the
+# Slide structs (defined in this re-executed script module) out of the pickled
+# cache, where a rerun swapping __main__ would make them unpicklable.
 def generate_slide_outline(analysis_text):
-    prompt = (
-        "You are a consultant at a top consulting firm. Based on the following analysis, design a complete slide deck outline "
-        "with natural flow. For each slide, provide a 'title' and 'content'. "
-        "If an image would enhance the slide, include an 'image_prompt' key with a brief description. "
-        "If a chart is needed, include a 'chart' key with an object specifying 'type' (bar or line), 'title', 'labels', and 'values'. "
-        "Output a valid JSON array with no extra commentary.\n\n"
-        "Analysis:\n" + analysis_text + "\n\nOutput the JSON array only."
-    )
+    # The analysis can be megabytes of PDF text; a single join sizes the prompt
+    # exactly once instead of building intermediate copies with +.
+    prompt = "".join((_OUTLINE_PROMPT_PREFIX, analysis_text, _OUTLINE_PROMPT_SUFFIX))
     outline_text = cohere_text_generate(prompt, max_tokens=400)
     if not outline_text:
+        cohere_text_generate.clear(prompt, max_tokens=400)  # Let the next attempt re-sample
         st.error("API Problem: The API returned an empty output for the slide outline.")
         raise ValueError("Empty output from API.")
     try:
-        slides = json.loads(outline_text)
-    except json.JSONDecodeError as e:
+        slides = msgspec.json.decode(outline_text, type=list[Slide], strict=False)
+    except msgspec.DecodeError as e:
         st.error("Parsing Problem: The API returned non-empty output that could not be parsed as JSON. Raw output:")
         st.text(outline_text)
         try:
-            slides = extract_json(outline_text)
-            st.warning("JSON was extracted using regex fallback.")
+            slides = msgspec.convert(extract_json(outline_text), type=list[Slide], strict=False)
+            st.warning("JSON was extracted from the surrounding text as a fallback.")
         except Exception as e2:
             st.error("Failed to extract valid JSON from the response.")
             slides = None  # signal that parsing failed
+            # Don't keep serving a completion that cannot be parsed; the next
+            # click on Generate should sample a fresh one.
+            cohere_text_generate.clear(prompt, max_tokens=400)
     return slides, outline_text
 
 # --- Convert Outline to Markdown ---
 def convert_outline_to_md(slides):
-    md = ""
+    parts = []
     for idx, slide in enumerate(slides, start=1):
-        title = slide.get("title", "Untitled Slide")
-        content = slide.get("content", "")
-        md += f"# Slide {idx}: {title}\n\n"
-        md += f"**Content:**\n\n{content}\n\n"
-        if "image_prompt" in slide:
-            image_prompt = slide.get("image_prompt")
-            md += f"**Image Prompt:** {image_prompt}\n\n"
-        if "chart" in slide:
-            chart = slide.get("chart")
-            md += f"**Chart Details:**\n"
-            md += f"- Type: {chart.get('type', '')}\n"
-            md += f"- Title: {chart.get('title', '')}\n"
-            labels = chart.get("labels", [])
-            values = chart.get("values", [])
-            if labels and values:
-                md += f"- Labels: {', '.join(labels)}\n"
-                md += f"- Values: {', '.join(map(str, values))}\n"
-        md += "\n---\n\n"
-    return md
+        parts.append(f"# Slide {idx}: {slide.title}\n\n")
+        parts.append(f"**Content:**\n\n{slide.content}\n\n")
+        if slide.image_prompt is not None:
+            parts.append(f"**Image Prompt:** {slide.image_prompt}\n\n")
+        chart = parse_chart(slide.chart)
+        if chart is not None:
+            parts.append(f"**Chart Details:**\n")
+            parts.append(f"- Type: {chart.type}\n")
+            parts.append(f"- Title: {chart.title}\n")
+            if chart.labels and chart.values:
+                parts.append(f"- Labels: {', '.join(map(str, chart.labels))}\n")
+                parts.append(f"- Values: {', '.join(map(str, chart.values))}\n")
+        parts.append("\n---\n\n")
+    return "".join(parts)
 
 # --- Google Slides Creation ---
+# Credential parsing and discovery-document build are slow and the client is
+# reusable, so one service object is shared across sessions and reruns.
+@st.cache_resource
+def get_slides_client():
+    # Build credentials from service account info stored in st.secrets["google_service_account"].
+    # They are scoped here, not by build(), because the same object also backs
+    # the per-call AuthorizedHttp in create_google_slides.
+    creds = service_account.Credentials.from_service_account_info(
+        st.secrets["google_service_account"], scopes=SLIDES_SCOPES
+    )
+    return build("slides", "v1", credentials=creds, cache_discovery=False), creds
+
+# Fixed text-box geometry, built once per script run, not per slide. Per-slide
+# requests only add object ids and reference these dicts; the request body is
+# serialized, never mutated, so sharing them across slides is safe.
+_TITLE_BOX_GEOMETRY = {
+    "size": {
+        "height": {"magnitude": 50, "unit": "PT"},
+        "width": {"magnitude": 400, "unit": "PT"}
+    },
+    "transform": {
+        "scaleX": 1,
+        "scaleY": 1,
+        "translateX": 50,
+        "translateY": 50,
+        "unit": "PT"
+    }
+}
+_CONTENT_BOX_GEOMETRY = {
+    "size": {
+        "height": {"magnitude": 200, "unit": "PT"},
+        "width": {"magnitude": 400, "unit": "PT"}
+    },
+    "transform": {
+        "scaleX": 1,
+        "scaleY": 1,
+        "translateX": 50,
+        "translateY": 150,
+        "unit": "PT"
+    }
+}
+_BLANK_LAYOUT = {"predefinedLayout": "BLANK"}
+
 def create_google_slides(slides_outline, presentation_title):
-    # Build credentials from service account info stored in st.secrets["google_service_account"]
-    creds = service_account.Credentials.from_service_account_info(st.secrets["google_service_account"])
-    slides_service = build("slides", "v1", credentials=creds)
+    slides_service, creds = get_slides_client()
+    # httplib2 connections are not thread-safe, so each call gets its own.
+    http = AuthorizedHttp(creds, http=httplib2.Http())
     # Create a new presentation
-    presentation = slides_service.presentations().create(body={"title": presentation_title}).execute()
+    presentation = slides_service.presentations().create(body={"title": presentation_title}).execute(http=http)
     presentation_id = presentation.get("presentationId")
-    # For each slide in the outline, add a new slide with title and content text boxes
-    for slide in slides_outline:
+    # For each slide in the outline, add a new slide with title and content text boxes.
+    # All requests go out in a single batchUpdate; slides are inserted after the
+    # presentation's initial slide in outline order.
+    requests_list = []
+    for idx, slide in enumerate(slides_outline, start=1):
         slide_id = "slide_" + uuid.uuid4().hex
         title_box_id = "title_" + uuid.uuid4().hex
         content_box_id = "content_" + uuid.uuid4().hex
-        requests_list = [
+        requests_list += [
             {
                 "createSlide": {
                     "objectId": slide_id,
-                    "insertionIndex": "1",
-                    "slideLayoutReference": {"predefinedLayout": "BLANK"}
+                    "insertionIndex": idx,
+                    "slideLayoutReference": _BLANK_LAYOUT
                 }
             },
             {
                 "createShape": {
                     "objectId": title_box_id,
                     "shapeType": "TEXT_BOX",
-                    "elementProperties": {
-                        "pageObjectId": slide_id,
-                        "size": {
-                            "height": {"magnitude": 50, "unit": "PT"},
-                            "width": {"magnitude": 400, "unit": "PT"}
-                        },
-                        "transform": {
-                            "scaleX": 1,
-                            "scaleY": 1,
-                            "translateX": 50,
-                            "translateY": 50,
-                            "unit": "PT"
-                        }
-                    }
+                    "elementProperties": {"pageObjectId": slide_id, **_TITLE_BOX_GEOMETRY}
                 }
             },
             {
                 "insertText": {
                     "objectId": title_box_id,
                     "insertionIndex": 0,
-                    "text": slide.get("title", "Untitled Slide")
+                    "text": slide.title
                 }
             },
             {
                 "createShape": {
                     "objectId": content_box_id,
                     "shapeType": "TEXT_BOX",
-                    "elementProperties": {
-                        "pageObjectId": slide_id,
-                        "size": {
-                            "height": {"magnitude": 200, "unit": "PT"},
-                            "width": {"magnitude": 400, "unit": "PT"}
-                        },
-                        "transform": {
-                            "scaleX": 1,
-                            "scaleY": 1,
-                            "translateX": 50,
-                            "translateY": 150,
-                            "unit": "PT"
-                        }
-                    }
+                    "elementProperties": {"pageObjectId": slide_id, **_CONTENT_BOX_GEOMETRY}
                 }
             },
             {
                 "insertText": {
                     "objectId": content_box_id,
                     "insertionIndex": 0,
-                    "text": slide.get("content", "")
+                    "text": slide.content
                 }
             }
         ]
-        slides_service.presentations().batchUpdate(
-            presentationId=presentation_id, body={"requests": requests_list}
-        ).execute()
+    slides_service.presentations().batchUpdate(
+        presentationId=presentation_id, body={"requests": requests_list}
+    ).execute(http=http)
     return presentation_id
 
+# --- PDF Text Extraction ---
+def iter_pdf_page_texts(pdf):
+    """Yield each page's text, releasing the page's native resources as soon as it is read."""
+    for page in pdf:
+        try:
+            textpage = page.get_textpage()
+            try:
+                yield textpage.get_text_range()
+            finally:
+                textpage.close()
+        finally:
+            page.close()
+
+# PDFium must never be entered from two threads at once, even for different
+# documents, and Streamlit runs each session on its own thread. The lock is a
+# cached resource because the script is re-executed on every rerun, so a
+# module-level lock would not be shared between sessions.
+@st.cache_resource
+def get_pdfium_lock():
+    return threading.Lock()
+
+# Cached on the raw upload bytes so widget interactions do not re-parse the PDF.
+@st.cache_data(show_spinner=False)
+def extract_pdf_text(pdf_bytes):
+    with get_pdfium_lock():
+        pdf = pdfium.PdfDocument(pdf_bytes)
+        try:
+            return "\n".join(text for text in iter_pdf_page_texts(pdf) if text)
+        finally:
+            pdf.close()
+
 # --- Streamlit App ---
 def main():
     st.title("AI-Driven Google Slides Generator")
@@ -308,12 +477,7 @@ def main():
     uploaded_file = st.file_uploader("Upload your analysis document (PDF file)", type="pdf")
     if uploaded_file is not None:
         try:
-            pdf_reader = PyPDF2.PdfReader(uploaded_file)
-            analysis_text = ""
-            for page in pdf_reader.pages:
-                text = page.extract_text()
-                if text:
-                    analysis_text += text + "\n"
+            analysis_text = extract_pdf_text(uploaded_file.getvalue())
         except Exception as e:
             st.error(f"Error parsing PDF: {e}")
             return